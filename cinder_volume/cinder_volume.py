@@ -8,30 +8,85 @@ for managing Cinder volume services within a snap environment.
 """
 
 import abc
+import concurrent.futures
+import functools
 import inspect
 import logging
+import os
+import types
 import typing
 from pathlib import Path
 
 import jinja2
 import pydantic
-from snaphelpers import Snap
+from snaphelpers import Snap, SnapCtl
 
 from . import configuration, context, error, log, services, template
 
 ETC_CINDER = Path("etc/cinder")
+JINJA_CACHE = Path("jinja_cache")
+TEMPLATE_WORKERS = 8
 
 
 CONF = typing.TypeVar("CONF", bound=configuration.BaseConfiguration)
 
+# Backend configuration field -> context class rendering it.
+BACKEND_CONTEXTS: typing.Mapping[str, type[context.BaseBackendContext]] = {
+    "ceph": context.CephBackendContext,
+    "hitachi": context.HitachiBackendContext,
+    "pure": context.PureBackendContext,
+    "dellsc": context.DellscBackendContext,
+    "dellpowerstore": context.DellpowerstoreBackendContext,
+}
+
+
+@functools.cache
+def _config_keys(config_type: type[configuration.BaseConfiguration]) -> tuple[str, ...]:
+    """Return the top level snap configuration keys of a configuration type."""
+    return tuple(config_type.model_fields)
+
+
+def _locations(snap: Snap) -> dict[str, Path]:
+    """Map each template location to its snap path."""
+    return {
+        location: getattr(snap.paths, location)
+        for location in typing.get_args(template.Locations)
+    }
+
+
+@functools.lru_cache(maxsize=512)
+def _compile_value(value: str) -> jinja2.Template:
+    """Compile a backend configuration value as a jinja2 template.
+
+    Compiled templates do not depend on the render context, the cache is
+    keyed on the source only and shared by all backends.
+    """
+    return jinja2.Template(value)
+
+
+def _render_value(value: str, context: typing.Mapping[str, typing.Any]) -> str:
+    """Render a backend configuration value.
+
+    Values without any jinja2 delimiter render to themselves, unless jinja2
+    would normalize their line endings, so they are returned as is.
+    """
+    if "{" not in value and "\r" not in value and not value.endswith("\n"):
+        return value
+    return _compile_value(value).render(**context)
+
 
 class CinderVolume(typing.Generic[CONF], abc.ABC):
     """Abstract base class for Cinder volume service implementations."""
 
     def __init__(self) -> None:
         """Initialize the CinderVolume instance."""
+        self._config: CONF | None = None
         self._contexts: typing.Sequence[context.Context] | None = None
+        self._render_context: dict[str, typing.Mapping[str, typing.Any]] | None = None
         self._backend_contexts: context.CinderBackendContexts | None = None
+        self._jinja_env: jinja2.Environment | None = None
+        self._template_cache: dict[str, jinja2.Template] = {}
+        self._template_names: frozenset[str] | None = None
 
     @classmethod
     def install_hook(cls, snap: Snap) -> None:
@@ -70,8 +125,8 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
             raise
 
         self.setup_dirs(snap, backend_contexts)
-        modified = self.template(snap)
-        backend_tpls = []
+        modified = self.template(snap, backend_contexts)
+        backend_tpls: list[template.Template] = []
         for backend_context in backend_contexts.contexts.values():
             backend_tpls.extend(backend_context.template_files())
             backend_context.setup(snap)
@@ -84,12 +139,11 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
         backend_tpls: typing.Sequence[template.Template],
     ) -> None:
         """Start the Cinder volume services."""
-        modified_files: set[Path] = set()
-        for tpl in modified_tpl:
-            modified_files.add(tpl.rel_path())
-        backend_files: set[Path] = set()
-        for tpl in backend_tpls:
-            backend_files.add(tpl.rel_path())
+        modified_files = frozenset(tpl.rel_path() for tpl in modified_tpl)
+        # Backend files are consumed by every service
+        backend_modified = not modified_files.isdisjoint(
+            tpl.rel_path() for tpl in backend_tpls
+        )
         snap_services = snap.services.list()
         for service in services.services():
             snap_service = snap_services.get(service.name)
@@ -97,10 +151,9 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
                 logging.warning("Service %s not found in snap services", service.name)
                 continue
 
-            common = modified_files.intersection(
-                set(service.configuration_files) | backend_files
-            )
-            if common:
+            if backend_modified or any(
+                conf_file in modified_files for conf_file in service.configuration_files
+            ):
                 logging.debug("Restarting service %s", service.name)
                 snap_service.restart()
             else:
@@ -113,15 +166,26 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
         raise NotImplementedError
 
     def get_config(self, snap: Snap) -> CONF:
-        """Get the configuration for the snap."""
+        """Get the configuration for the snap.
+
+        The configuration is read and validated once per instance, hooks
+        always work on a fresh instance.
+        """
+        if self._config is not None:
+            return self._config
         logging.debug("Getting configuration")
-        keys = self.config_type().model_fields.keys()
-        all_config = snap.config.get_options(*keys).as_dict()
+        config_type = self.config_type()
+        raw_config = self._snap_config_json(snap, _config_keys(config_type))
 
         try:
-            return self.config_type().model_validate(all_config)
+            self._config = config_type.from_snap_json(raw_config)
         except pydantic.ValidationError as e:
             raise error.CinderError("Invalid configuration") from e
+        return self._config
+
+    def _snap_config_json(self, snap: Snap, keys: typing.Sequence[str]) -> str:
+        """Return the snap configuration for keys as a JSON document."""
+        return SnapCtl(env=snap.environ).run("get", "-d", *keys)
 
     def directories(self) -> list[template.Directory]:
         """Directories to be created on the common path."""
@@ -129,6 +193,7 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
             template.CommonDirectory("etc/cinder"),
             template.CommonDirectory("etc/cinder/cinder.conf.d"),
             template.CommonDirectory("lib/cinder"),
+            template.CommonDirectory(JINJA_CACHE),
         ]
 
     def template_files(self) -> list[template.Template]:
@@ -158,12 +223,19 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
     def render_context(
         self, snap: Snap
     ) -> typing.MutableMapping[str, typing.Mapping[str, str]]:
-        """Render the context for the snap."""
-        context = {}
-        for ctx in self.contexts(snap):
-            logging.debug("Adding context: %s", ctx.namespace)
-            context[ctx.namespace] = ctx.context()
-        return context
+        """Render the context for the snap.
+
+        Namespaces are collected from the contexts once and frozen, as they
+        are shared by every caller and rendering thread. Each call returns a
+        new mapping so callers are free to add namespaces to it.
+        """
+        if self._render_context is None:
+            self._render_context = {
+                ctx.namespace: types.MappingProxyType(dict(ctx.context()))
+                for ctx in self.contexts(snap)
+            }
+            logging.debug("Rendered contexts: %s", ", ".join(self._render_context))
+        return dict(self._render_context)
 
     def setup_dirs(
         self, snap: Snap, backend_contexts: context.CinderBackendContexts | None = None
@@ -174,11 +246,18 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
             for backend_context in backend_contexts.contexts.values():
                 directories.extend(backend_context.directories())
 
+        locations = _locations(snap)
+        created: set[Path] = set()
         for d in directories:
-            path: Path = getattr(snap.paths, d.location).joinpath(d.path)
+            path = locations[d.location].joinpath(d.path)
+            # several backends of a kind share the same directories
+            if path in created:
+                continue
+            created.add(path)
             logging.debug("Creating directory: %s", path)
             path.mkdir(parents=True, exist_ok=True)
-            path.chmod(d.mode)
+            if path.stat().st_mode & 0o7777 != d.mode:
+                path.chmod(d.mode)
 
     def templates_search_path(self, snap: Snap) -> list[Path]:
         """Get the search path for templates."""
@@ -195,20 +274,15 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
 
     def _process_template(
         self,
-        snap: Snap,
-        env: jinja2.Environment,
+        locations: typing.Mapping[str, Path],
+        compiled: typing.Mapping[str, jinja2.Template],
         template: template.Template,
         context: typing.Mapping[str, typing.Mapping[str, str]],
     ) -> bool:
         file_name = template.filename
-        dest_dir: Path = getattr(snap.paths, template.location) / template.dest
-        dest_dir.mkdir(parents=True, exist_ok=True)
+        dest_dir = locations[template.location] / template.dest
         dest_file = dest_dir / file_name.removesuffix(".j2")
 
-        original_hash = None
-        if dest_file.exists():
-            original_hash = hash(dest_file.read_text())
-
         if template.conditionals:
             if not all(cond(context) for cond in template.conditionals):
                 logging.debug(
@@ -219,81 +293,166 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
                     dest_file.unlink()
                 return False
 
-        tpl = None
-        template_file = template.template()
-        try:
-            tpl = env.get_template(template_file)
-        except jinja2.exceptions.TemplateNotFound:
-            logging.debug("Template %s not found, trying with .j2", template_file)
-            tpl = env.get_template(template_file + ".j2")
-
-        rendered = tpl.render(**context)
+        rendered = compiled[template.template()].render(**context)
         if len(rendered) > 0 and rendered[-1] != "\n":
             # ensure trailing new line
             rendered += "\n"
 
-        new_hash = hash(rendered)
-
-        if original_hash == new_hash:
+        new_content = rendered.encode("utf-8")
+        try:
+            dest_stat = dest_file.stat()
+        except FileNotFoundError:
+            dest_stat = None
+        # Only read the existing file when the size matches, any other
+        # size means the content has changed.
+        if (
+            dest_stat is not None
+            and dest_stat.st_size == len(new_content)
+            and dest_file.read_bytes() == new_content
+        ):
             logging.debug("File %s has not changed, skipping", dest_file)
             return False
         logging.debug("File %s has changed, writing new content", dest_file)
-        dest_file.write_text(rendered)
-        dest_file.chmod(template.mode)
+        dest_file.write_bytes(new_content)
+        if dest_stat is None or dest_stat.st_mode & 0o7777 != template.mode:
+            dest_file.chmod(template.mode)
         return True
 
+    def _get_template(self, env: jinja2.Environment, name: str) -> jinja2.Template:
+        """Return the compiled template for name, resolved once per instance."""
+        tpl = self._template_cache.get(name)
+        if tpl is None:
+            tpl = env.get_template(self._resolve_template_name(env, name))
+            self._template_cache[name] = tpl
+        return tpl
+
+    def _resolve_template_name(self, env: jinja2.Environment, name: str) -> str:
+        """Return the name of the template file, adding .j2 when needed."""
+        if self._template_names is None:
+            self._template_names = frozenset(env.list_templates())
+        if name not in self._template_names and name + ".j2" in self._template_names:
+            logging.debug("Template %s not found, using %s.j2", name, name)
+            return name + ".j2"
+        return name
+
     def _render_specific_backend_configs(
         self,
         context: typing.Mapping[str, typing.Mapping[str, str]],
         value: typing.Any,
     ) -> typing.Any:
-        """Allow to render backend values with jinja2 templates."""
+        """Allow to render backend values with jinja2 templates.
+
+        Nested dictionaries are walked iteratively and copied, the given
+        value is left untouched.
+        """
         if isinstance(value, str):
-            return jinja2.Template(value).render(**context)
-        elif isinstance(value, dict):
-            return {
-                k: self._render_specific_backend_configs(context, v)
-                for k, v in value.items()
-            }
-        return value
+            return _render_value(value, context)
+        if not isinstance(value, dict):
+            return value
+        rendered: dict[str, typing.Any] = {}
+        stack = [(value, rendered)]
+        while stack:
+            source, target = stack.pop()
+            for k, v in source.items():
+                if isinstance(v, str):
+                    target[k] = _render_value(v, context)
+                elif isinstance(v, dict):
+                    target[k] = {}
+                    stack.append((v, target[k]))
+                else:
+                    target[k] = v
+        return rendered
+
+    def environment(self, snap: Snap) -> jinja2.Environment:
+        """Return the jinja2 environment used to render templates.
 
-    def template(self, snap: Snap) -> list[template.Template]:
+        The environment is built once per instance; templates never change
+        during a hook run so there is no need to check them for updates.
+        Compiled templates are persisted in the snap common directory, once
+        it has been created, so that following hook runs skip parsing them.
+        """
+        if self._jinja_env is None:
+            bytecode_cache = None
+            cache_dir = snap.paths.common / JINJA_CACHE
+            if cache_dir.is_dir():
+                bytecode_cache = jinja2.FileSystemBytecodeCache(str(cache_dir))
+            env = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(
+                    searchpath=self.templates_search_path(snap)
+                ),
+                keep_trailing_newline=True,
+                autoescape=jinja2.select_autoescape(),
+                cache_size=-1,
+                auto_reload=False,
+                bytecode_cache=bytecode_cache,
+            )
+            env.globals.update(
+                {
+                    "backend_ctx": context.backend_ctx,
+                    "cinder_name": context.cinder_name,
+                    "cinder_ctx": context.cinder_ctx,
+                }
+            )
+            self._jinja_env = env
+        return self._jinja_env
+
+    def template(
+        self,
+        snap: Snap,
+        backend_contexts: context.CinderBackendContexts | None = None,
+    ) -> list[template.Template]:
         """Render templates for the Cinder volume service."""
-        env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(searchpath=self.templates_search_path(snap)),
-            keep_trailing_newline=True,
-            autoescape=jinja2.select_autoescape(),
-        )
-        env.globals.update(
-            {
-                "backend_ctx": context.backend_ctx,
-                "cinder_name": context.cinder_name,
-                "cinder_ctx": context.cinder_ctx,
-            }
-        )
+        env = self.environment(snap)
         modified_templates: list[template.Template] = []
         try:
             ctx = self.render_context(snap)
         except Exception as e:
             logging.error("Failed to render context: %s", e)
             return modified_templates
-        backend_contexts = self.backend_contexts(snap)
-        ctx[backend_contexts.namespace] = self._render_specific_backend_configs(
+        if backend_contexts is None:
+            backend_contexts = self.backend_contexts(snap)
+        rendered_backends = self._render_specific_backend_configs(
             ctx, backend_contexts.context()
         )
-        # process general templates
-        for tpl in self.template_files():
-            if self._process_template(snap, env, tpl, ctx):
-                modified_templates.append(tpl)
-        # process backend specific templates
+        ctx[backend_contexts.namespace] = rendered_backends
+        # Snapshot the context per backend so templates can be rendered
+        # concurrently without sharing a mutated context.
+        tasks: list[tuple[template.Template, typing.Mapping[str, typing.Any]]] = [
+            (tpl, ctx) for tpl in self.template_files()
+        ]
+        cinder_contexts = rendered_backends["contexts"]
         for backend_context in backend_contexts.contexts.values():
-            ctx[context.BACKEND_CTX_KEY] = backend_context.context()
-            ctx[context.CINDER_CTX_KEY] = backend_context.backend_name  # type: ignore
-            for tpl in backend_context.template_files():
-                if self._process_template(snap, env, tpl, ctx):
+            name = backend_context.backend_name
+            backend_ctx = {
+                **ctx,
+                context.BACKEND_CTX_KEY: backend_context.context(),
+                context.CINDER_CTX_KEY: name,
+                context.BACKEND_NS_KEY: context.backend_namespace(
+                    name, cinder_contexts[name], backend_context.context()
+                ),
+            }
+            tasks.extend((tpl, backend_ctx) for tpl in backend_context.template_files())
+
+        locations = _locations(snap)
+        for dest_dir in {locations[tpl.location] / tpl.dest for tpl, _ in tasks}:
+            dest_dir.mkdir(parents=True, exist_ok=True)
+
+        # Resolve and compile every template once here, so worker threads
+        # never fill the template caches.
+        compiled = {
+            name: self._get_template(env, name)
+            for name in {tpl.template() for tpl, _ in tasks}
+        }
+
+        # Rendering is dominated by filesystem syscalls, overlap them.
+        process = functools.partial(self._process_template, locations, compiled)
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=TEMPLATE_WORKERS
+        ) as executor:
+            results = executor.map(process, *zip(*tasks))
+            for (tpl, _), modified in zip(tasks, results):
+                if modified:
                     modified_templates.append(tpl)
-            ctx.pop(context.CINDER_CTX_KEY)
-            ctx.pop(context.BACKEND_CTX_KEY)
 
         return modified_templates
 
@@ -304,19 +463,27 @@ class CinderVolume(typing.Generic[CONF], abc.ABC):
         their template files are also removed from the filesystem.
         """
         backend_config_dir = snap.paths.common / "etc/cinder/cinder.conf.d"
-        if not backend_config_dir.exists():
-            return
 
         # Remove all .conf files in cinder.conf.d directory
         # These are backend-specific configuration files
-        for conf_file in backend_config_dir.glob("*.conf"):
-            try:
-                logging.debug("Removing backend config file: %s", conf_file)
-                conf_file.unlink()
-            except OSError as e:
-                logging.warning(
-                    "Failed to remove backend config file %s: %s", conf_file, e
-                )
+        try:
+            with os.scandir(backend_config_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".conf") or entry.is_dir(
+                        follow_symlinks=False
+                    ):
+                        continue
+                    try:
+                        logging.debug("Removing backend config file: %s", entry.path)
+                        os.unlink(entry.path)
+                    except OSError as e:
+                        logging.warning(
+                            "Failed to remove backend config file %s: %s",
+                            entry.path,
+                            e,
+                        )
+        except FileNotFoundError:
+            return
 
 
 class GenericCinderVolume(CinderVolume[configuration.Configuration]):
@@ -327,7 +494,7 @@ class GenericCinderVolume(CinderVolume[configuration.Configuration]):
         return configuration.Configuration
 
     def backend_contexts(self, snap: Snap) -> context.CinderBackendContexts:
-        """Instantiated backend context using fully dynamic discovery."""
+        """Instantiated backend context for every backend field of the config type."""
         if self._backend_contexts is None:
             try:
                 cfg = self.get_config(snap)
@@ -336,28 +503,17 @@ class GenericCinderVolume(CinderVolume[configuration.Configuration]):
 
             backend_ctxs: dict[str, context.BaseBackendContext] = {}
 
-            # Auto-discover all backend types from configuration
-            for field_name, field_info in self.config_type().model_fields.items():
-                # Skip non-backend fields
-                if not isinstance(getattr(cfg, field_name), dict):
-                    continue
-
-                # Get the context class name by convention: {Backend}BackendContext
-                context_class_name = f"{field_name.title()}BackendContext"
-
-                # Get the context class from the context module
-                if hasattr(context, context_class_name):
-                    context_class = getattr(context, context_class_name)
-                    backend_configs = getattr(cfg, field_name)
-
-                    # Instantiate contexts for all backends of this type
-                    for name, be_cfg in backend_configs.items():
-                        backend_ctxs[name] = context_class(name, be_cfg.model_dump())
-                else:
+            for field_name in configuration.backend_fields(self.config_type()):
+                context_class = BACKEND_CONTEXTS.get(field_name)
+                if context_class is None:
                     logging.warning(
-                        f"Context class {context_class_name} not"
-                        f" found for backend type {field_name}"
+                        f"Context class not found for backend type {field_name}"
                     )
+                    continue
+
+                # Instantiate contexts for all backends of this type
+                for name, be_cfg in getattr(cfg, field_name).items():
+                    backend_ctxs[name] = context_class.from_model(name, be_cfg)
 
             self._backend_contexts = context.CinderBackendContexts(
                 enabled_backends=list(backend_ctxs.keys()),
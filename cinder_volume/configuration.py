@@ -7,22 +7,32 @@ This module holds the definition of all configuration options the snap
 takes as input from `snap set`.
 """
 
+import functools
 import typing
 
 import pydantic
-import pydantic.alias_generators
 from pydantic import Field
+from pydantic.alias_generators import to_snake
 
 
+@functools.lru_cache(maxsize=512)
 def to_kebab(value: str) -> str:
     """Convert a string to kebab-case."""
-    return pydantic.alias_generators.to_snake(value).replace("_", "-")
+    if value.islower() and value.replace("_", "").isalpha():
+        # Already snake_case, as all field names are, to_snake is a no-op
+        return value.replace("_", "-")
+    return to_snake(value).replace("_", "-")
+
+
+_KEBAB_TO_SNAKE = str.maketrans("-", "_")
 
 
 class ParentConfig(pydantic.BaseModel):
     """Set common model configuration for all models."""
 
     model_config = pydantic.ConfigDict(
+        # Configuration is read-only once validated
+        frozen=True,
         alias_generator=pydantic.AliasGenerator(
             validation_alias=to_kebab,
             serialization_alias=to_kebab,
@@ -72,26 +82,52 @@ class BaseConfiguration(ParentConfig):
     rabbitmq: RabbitMQConfiguration
     cinder: CinderConfiguration
 
+    @classmethod
+    def from_snap_json(cls, raw: str | bytes) -> typing.Self:
+        """Load the configuration from the JSON output of `snapctl get -d`.
+
+        The document is parsed and validated in a single pass, without
+        building an intermediate python dict.
+        """
+        return cls.model_validate_json(raw)
+
 
 class BaseBackendConfiguration(ParentConfig):
     """Base configuration for storage backends."""
 
+    model_config = pydantic.ConfigDict(
+        extra="allow",  # Allow extra fields not defined in the model
+        # Vendor schemas are only built once a model using them validates
+        defer_build=True,
+        alias_generator=pydantic.AliasGenerator(
+            validation_alias=to_kebab,
+            serialization_alias=to_snake,
+        ),
+    )
+
+    @classmethod
+    @functools.cache
+    def _defined_aliases(cls) -> dict[str, str]:
+        """Map the validation aliases of the defined fields to their names."""
+        return {to_kebab(name): name for name in cls.model_fields}
+
     @pydantic.model_validator(mode="before")
     @classmethod
     def convert_extra_fields(cls, data):
         """Convert kebab-case keys to snake_case for extra fields."""
         if isinstance(data, dict):
-            converted = {}
-            defined_fields = set(cls.model_fields.keys())
-            for key, value in data.items():
-                snake_key = key.replace("-", "_")
-                if snake_key in defined_fields:
-                    # Defined field - keep original key for alias generator
-                    converted[key] = value
-                else:
-                    # Extra field - convert to snake_case
-                    converted[snake_key] = value
-            return converted
+            if not any("-" in key for key in data):
+                # Nothing to convert
+                return data
+            defined_aliases = cls._defined_aliases()
+            return {
+                # Defined fields keep their original key for the alias
+                # generator, extra fields are converted to snake_case
+                (
+                    key if key in defined_aliases else key.translate(_KEBAB_TO_SNAKE)
+                ): value
+                for key, value in data.items()
+            }
         return data
 
     image_volume_cache_enabled: bool | None = None
@@ -105,6 +141,9 @@ class BaseBackendConfiguration(ParentConfig):
 class CephConfiguration(BaseBackendConfiguration):
     """Configuration for Ceph storage backend."""
 
+    # Only the documented options are rendered for Ceph backends
+    model_config = pydantic.ConfigDict(extra="ignore")
+
     rbd_exclusive_cinder_pool: bool = True
     report_discard_supported: bool = True
     rbd_flatten_volume_from_snapshot: bool = False
@@ -122,14 +161,6 @@ class HitachiConfiguration(BaseBackendConfiguration):
     Defaults follow the upstream driver recommendations/documentation.
     """
 
-    model_config = pydantic.ConfigDict(
-        extra="allow",  # Allow extra fields not defined in the model
-        alias_generator=pydantic.AliasGenerator(
-            validation_alias=to_kebab,
-            serialization_alias=pydantic.alias_generators.to_snake,
-        ),
-    )
-
     # Mandatory connection parameters
     san_ip: pydantic.IPvAnyAddress
     san_username: str
@@ -148,14 +179,6 @@ class PureConfiguration(BaseBackendConfiguration):
     with advanced features like replication, TriSync, and auto-eradication.
     """
 
-    model_config = pydantic.ConfigDict(
-        extra="allow",  # Allow extra fields not defined in the model
-        alias_generator=pydantic.AliasGenerator(
-            validation_alias=to_kebab,
-            serialization_alias=pydantic.alias_generators.to_snake,
-        ),
-    )
-
     # Core required fields
     san_ip: pydantic.IPvAnyAddress  # FlashArray management IP/FQDN
     pure_api_token: str  # REST API authorization token
@@ -169,14 +192,6 @@ class DellSCConfiguration(BaseBackendConfiguration):
     with dual DSM support, network filtering, and comprehensive timeout controls.
     """
 
-    model_config = pydantic.ConfigDict(
-        extra="allow",  # Allow extra fields not defined in the model
-        alias_generator=pydantic.AliasGenerator(
-            validation_alias=to_kebab,
-            serialization_alias=pydantic.alias_generators.to_snake,
-        ),
-    )
-
     # Core required fields
     san_ip: pydantic.IPvAnyAddress  # Dell DSM management IP/FQDN
     san_login: str  # DSM management username
@@ -197,14 +212,6 @@ class DellpowerstoreConfiguration(BaseBackendConfiguration):
     This configuration supports iSCSI, Fibre Channel and NVMe-TCP protocols.
     """
 
-    model_config = pydantic.ConfigDict(
-        extra="allow",  # Allow extra fields not defined in the model
-        alias_generator=pydantic.AliasGenerator(
-            validation_alias=to_kebab,
-            serialization_alias=pydantic.alias_generators.to_snake,
-        ),
-    )
-
     # Core required fields
     san_ip: pydantic.IPvAnyAddress  # Dell PowerStore management IP/FQDN
     san_login: str  # Dell PowerStore management username
@@ -219,41 +226,55 @@ class Configuration(BaseConfiguration):
     downstream snaps.
     """
 
+    # Downstream snaps importing this module do not build the vendor schemas
+    model_config = pydantic.ConfigDict(defer_build=True)
+
     ceph: dict[str, CephConfiguration] = {}
     hitachi: dict[str, HitachiConfiguration] = {}
     pure: dict[str, PureConfiguration] = {}
     dellsc: dict[str, DellSCConfiguration] = {}
     dellpowerstore: dict[str, DellpowerstoreConfiguration] = {}
 
+    def iter_backends(
+        self,
+    ) -> typing.Iterator[tuple[str, str, BaseBackendConfiguration]]:
+        """Yield the type, key and configuration of every configured backend."""
+        for backend_type in backend_fields(type(self)):
+            for backend_key, backend in getattr(self, backend_type).items():
+                yield backend_type, backend_key, backend
+
     @pydantic.model_validator(mode="after")
     def validate_unique_backend_names(self):
         """Validate that all backend names are unique across all backend types."""
         backend_names = set()
         ceph_pools = set()
 
-        # Check all backend types for unique backend names
-        for backend_type, backends in [
-            ("ceph", self.ceph),
-            ("hitachi", self.hitachi),
-            ("pure", self.pure),
-            ("dellsc", self.dellsc),
-        ]:
-            for backend_key, backend in backends.items():
-                # Check for duplicate backend names across all types
-                if backend.volume_backend_name in backend_names:
+        for backend_type, backend_key, backend in self.iter_backends():
+            # Check for duplicate backend names across all types
+            if backend.volume_backend_name in backend_names:
+                raise ValueError(
+                    f"Duplicate backend name '{backend.volume_backend_name}' "
+                    f"found in {backend_type} backend '{backend_key}'"
+                )
+            backend_names.add(backend.volume_backend_name)
+
+            # Check for duplicate Ceph pools (only applies to Ceph backends)
+            if isinstance(backend, CephConfiguration):
+                if backend.rbd_pool in ceph_pools:
                     raise ValueError(
-                        f"Duplicate backend name '{backend.volume_backend_name}' "
-                        f"found in {backend_type} backend '{backend_key}'"
+                        f"Duplicate Ceph pool '{backend.rbd_pool}' "
+                        f"found in backend '{backend_key}'"
                     )
-                backend_names.add(backend.volume_backend_name)
-
-                # Check for duplicate Ceph pools (only applies to Ceph backends)
-                if backend_type == "ceph" and hasattr(backend, "rbd_pool"):
-                    if backend.rbd_pool in ceph_pools:
-                        raise ValueError(
-                            f"Duplicate Ceph pool '{backend.rbd_pool}' "
-                            f"found in backend '{backend_key}'"
-                        )
-                    ceph_pools.add(backend.rbd_pool)
+                ceph_pools.add(backend.rbd_pool)
 
         return self
+
+
+@functools.cache
+def backend_fields(config_type: type[BaseConfiguration]) -> tuple[str, ...]:
+    """Return the fields of a configuration type holding storage backends."""
+    return tuple(
+        name
+        for name, field in config_type.model_fields.items()
+        if typing.get_origin(field.annotation) is dict
+    )
@@ -4,19 +4,22 @@
 """Context module for rendering configuration and templates."""
 
 import abc
-import collections.abc
+import collections
 import pathlib
+import types
 import typing
 
 import jinja2
 from snaphelpers import Snap
 
-from . import error, template
+from . import configuration, error, template
 
 
 class Context(abc.ABC):
     """Abstract base class for context providers."""
 
+    __slots__ = ()
+
     namespace: str
 
     @abc.abstractmethod
@@ -28,6 +31,8 @@ class Context(abc.ABC):
 class ConfigContext(Context):
     """Context provider for configuration data."""
 
+    __slots__ = ("namespace", "config")
+
     def __init__(self, namespace: str, config: typing.Mapping[str, typing.Any]):
         """Initialize with namespace and config."""
         self.namespace = namespace
@@ -41,23 +46,49 @@ class ConfigContext(Context):
 class SnapPathContext(Context):
     """Context provider for snap paths."""
 
+    __slots__ = ("snap", "_paths")
+
     namespace = "snap_paths"
 
     def __init__(self, snap: Snap):
         """Initialize with snap instance."""
         self.snap = snap
+        # snap paths do not change at runtime
+        self._paths = types.MappingProxyType(
+            {name: getattr(snap.paths, name) for name in snap.paths.__slots__}
+        )
 
     def context(self) -> typing.Mapping[str, typing.Any]:
         """Return snap paths as context."""
-        return {
-            name: getattr(self.snap.paths, name) for name in self.snap.paths.__slots__
-        }
+        return self._paths
 
 
 ETC_CINDER_D_CONF_DIR = pathlib.Path("etc/cinder/cinder.conf.d")
 
+# Rendered later with the snap paths, only the backend name is filled in here
+_PEM_TMPL = (
+    "{{{{ snap_paths.common }}}}/" + ETC_CINDER_D_CONF_DIR.as_posix() + "/{name}.pem"
+)
+_MIRROR_PEM_TMPL = _PEM_TMPL.replace("{name}", "{name}_mirror")
+
 CINDER_CTX_KEY = "ctx_cinder_name"
 BACKEND_CTX_KEY = "ctx_backend"
+BACKEND_NS_KEY = "ctx_backend_ns"
+_CINDER_BACKENDS_KEY = "cinder_backends"
+_CONTEXTS_KEY = "contexts"
+
+
+def backend_namespace(
+    name: str,
+    cinder: typing.Mapping[str, typing.Any],
+    backend: typing.Mapping[str, typing.Any],
+) -> types.SimpleNamespace:
+    """Bundle what the backend template helpers resolve into one object.
+
+    Stored under `BACKEND_NS_KEY`, it lets the helpers answer with a single
+    context lookup instead of walking the cinder backends context.
+    """
+    return types.SimpleNamespace(name=name, cinder=cinder, backend=backend)
 
 
 @jinja2.pass_context
@@ -65,6 +96,8 @@ def cinder_name(
     ctx,
 ):
     """Get the backend configuration value."""
+    if ns := ctx.get(BACKEND_NS_KEY):
+        return ns.name
     if name := ctx.get(CINDER_CTX_KEY):
         return name
     raise error.CinderError("No backend name in context")
@@ -75,23 +108,38 @@ def cinder_ctx(
     ctx,
 ):
     """Get the cinder configuration value."""
-    return ctx["cinder_backends"]["contexts"][cinder_name(ctx)]
+    if ns := ctx.get(BACKEND_NS_KEY):
+        return ns.cinder
+    try:
+        return ctx[_CINDER_BACKENDS_KEY][_CONTEXTS_KEY][ctx[CINDER_CTX_KEY]]
+    except KeyError:
+        # Report a missing backend name the same way cinder_name does
+        cinder_name(ctx)
+        raise
 
 
 @jinja2.pass_context
 def backend_ctx(ctx):
     """Get the backend configuration value."""
+    if ns := ctx.get(BACKEND_NS_KEY):
+        return ns.backend
     return ctx[BACKEND_CTX_KEY]
 
 
+_EMPTY: typing.Mapping[str, typing.Any] = types.MappingProxyType({})
+
+
 def backend_variable_set(backend: str, *var: str) -> template.Conditional:
     """Return a conditional that checks if a variable is set in a context namespace."""
+    variables = tuple(var)
 
     def _conditional(context: template.ContextType) -> bool:
         ns_context = (
-            context.get("cinder_backends", {}).get("contexts", {}).get(backend, {})
+            context.get(_CINDER_BACKENDS_KEY, _EMPTY)
+            .get(_CONTEXTS_KEY, _EMPTY)
+            .get(backend, _EMPTY)
         )
-        return all(bool(ns_context.get(v)) for v in var)
+        return all(ns_context.get(v) for v in variables)
 
     return _conditional
 
@@ -99,37 +147,89 @@ def backend_variable_set(backend: str, *var: str) -> template.Conditional:
 class BaseBackendContext(Context):
     """Base class for backend context providers."""
 
+    __slots__ = (
+        "namespace",
+        "backend_name",
+        "backend_config",
+        "supports_cluster",
+        "_context",
+        "_cinder_context",
+        "_template_files",
+        "_directories",
+    )
+
     _hidden_keys: typing.Sequence[str] = ("driver_ssl_cert",)
+    _all_hidden_keys: typing.ClassVar[frozenset[str]] = frozenset(_hidden_keys)
+
+    def __init_subclass__(cls, **kwargs):
+        """Collect the hidden keys of the whole class hierarchy."""
+        super().__init_subclass__(**kwargs)
+        cls._all_hidden_keys = frozenset(
+            key
+            for klass in cls.mro()
+            if issubclass(klass, BaseBackendContext)
+            for key in klass._hidden_keys
+        )
 
     def __init__(self, backend_name: str, backend_config: dict[str, typing.Any]):
         """Initialize with backend name and config."""
+        protocol = backend_config.get("protocol")
+        if isinstance(protocol, str) and protocol != protocol.lower():
+            # Configurations not validated by a model may use any case
+            backend_config = {**backend_config, "protocol": protocol.lower()}
         self.namespace = backend_name
         self.backend_name = backend_name
         self.backend_config = backend_config
         self.supports_cluster = True
+        self._context: typing.Mapping[str, typing.Any] | None = None
+        self._cinder_context: typing.Mapping[str, typing.Any] | None = None
+        self._template_files: list[template.Template] | None = None
+        self._directories: list[template.Directory] | None = None
+
+    @classmethod
+    def from_model(
+        cls,
+        backend_name: str,
+        backend_config: configuration.BaseBackendConfiguration,
+    ) -> typing.Self:
+        """Instantiate from an already validated backend configuration.
+
+        The configuration is dumped once to a plain dict, no validation
+        happens again.
+        """
+        return cls(backend_name, backend_config.model_dump())
 
     def context(self) -> typing.Mapping[str, typing.Any]:
         """Full context for the backend configuration.
 
         This value is always associated to `namespace`, not
-        necessarily associated with `backend_name`.
+        necessarily associated with `backend_name`. It is built once by
+        `_build_context`.
         """
-        context = dict(self.backend_config)
-        if context.get("driver_ssl_cert"):
-            context["driver_ssl_cert_path"] = str(
-                pathlib.Path(r"{{ snap_paths.common }}")
-                / ETC_CINDER_D_CONF_DIR
-                / f"{self.backend_name}.pem"
-            )
-            context["driver_ssl_cert_verify"] = True
-        return context
+        if self._context is None:
+            self._context = self._build_context()
+        return self._context
+
+    def _build_context(self) -> typing.MutableMapping[str, typing.Any]:
+        """Build the context for the backend configuration.
+
+        Subclasses extend it by overriding this method. Additions are layered
+        over the backend configuration instead of copying it.
+        """
+        if not self.backend_config.get("driver_ssl_cert"):
+            return self.backend_config
+        return collections.ChainMap(
+            {
+                "driver_ssl_cert_path": _PEM_TMPL.format(name=self.backend_name),
+                "driver_ssl_cert_verify": True,
+            },
+            self.backend_config,
+        )
 
     @property
-    def hidden_keys(self) -> collections.abc.Generator[str]:
+    def hidden_keys(self) -> frozenset[str]:
         """Keys that should not be exposed in cinder context."""
-        for klass in self.__class__.mro():
-            if issubclass(klass, BaseBackendContext):
-                yield from klass._hidden_keys
+        return self._all_hidden_keys
 
     def cinder_context(self) -> typing.Mapping[str, typing.Any]:
         """Context specific for cinder configuration.
@@ -137,13 +237,31 @@ class BaseBackendContext(Context):
         This value is always associated to `backend_name`, not
         necessarily associated with `namespace`.
         """
-        context = dict(self.context())
-        for key in self.hidden_keys:
-            context.pop(key, None)
-        return {k: v for k, v in context.items() if v is not None}
+        if self._cinder_context is None:
+            hidden_keys = self._all_hidden_keys
+            self._cinder_context = {
+                k: v
+                for k, v in self.context().items()
+                if k not in hidden_keys and v is not None
+            }
+        return self._cinder_context
 
     def template_files(self) -> list[template.Template]:
-        """Files to be templated."""
+        """Files to be templated.
+
+        They only depend on the backend name and are built once by
+        `build_template_files`.
+        """
+        if self._template_files is None:
+            self._template_files = self.build_template_files()
+        return self._template_files
+
+    def build_template_files(self) -> list[template.Template]:
+        """Build the files to be templated.
+
+        Subclasses add their own files by overriding this method and
+        extending `super().build_template_files()`.
+        """
         return [
             template.CommonTemplate(
                 f"{self.backend_name}.conf",
@@ -164,7 +282,20 @@ class BaseBackendContext(Context):
         ]
 
     def directories(self) -> list[template.Directory]:
-        """Directories to be created."""
+        """Directories to be created.
+
+        They are built once by `build_directories`.
+        """
+        if self._directories is None:
+            self._directories = self.build_directories()
+        return self._directories
+
+    def build_directories(self) -> list[template.Directory]:
+        """Build the directories to be created.
+
+        Subclasses add their own directories by overriding this method and
+        extending `super().build_directories()`.
+        """
         return []
 
     def setup(self, snap: Snap):
@@ -175,6 +306,8 @@ class BaseBackendContext(Context):
 class CinderBackendContexts(Context):
     """Context provider for all Cinder backends."""
 
+    __slots__ = ("enabled_backends", "contexts", "cluster_ok", "_context")
+
     namespace = "cinder_backends"
 
     def __init__(
@@ -192,19 +325,24 @@ class CinderBackendContexts(Context):
             raise error.CinderError(
                 "Context missing configuration for backends: %s" % missing_backends
             )
-
-    def context(self) -> typing.Mapping[str, typing.Any]:
-        """Return context for all backends."""
-        cluster_ok = all(ctx.supports_cluster for ctx in self.contexts.values())
-        return {
+        # Only enabled backends are run by cinder-volume
+        self.cluster_ok = all(
+            contexts[backend].supports_cluster for backend in enabled_backends
+        )
+        # Backends are fixed once built, the context is computed once
+        self._context = {
             "enabled_backends": ",".join(self.enabled_backends),
-            "cluster_ok": cluster_ok,
+            "cluster_ok": self.cluster_ok,
             "contexts": {
                 config.backend_name: config.cinder_context()
-                for config in self.contexts.values()
+                for config in contexts.values()
             },
         }
 
+    def context(self) -> typing.Mapping[str, typing.Any]:
+        """Return context for all backends."""
+        return self._context
+
 
 ETC_CEPH = pathlib.Path("etc/ceph")
 
@@ -212,6 +350,8 @@ ETC_CEPH = pathlib.Path("etc/ceph")
 class CephBackendContext(BaseBackendContext):
     """Context provider for Ceph backend."""
 
+    __slots__ = ()
+
     _hidden_keys = ("rbd_key", "keyring", "mon_hosts", "auth")
 
     def __init__(self, backend_name: str, backend_config: dict[str, typing.Any]):
@@ -219,33 +359,15 @@ class CephBackendContext(BaseBackendContext):
         super().__init__(backend_name, backend_config)
         self.supports_cluster = True
 
-    def keyring(self) -> str:
-        """Return the keyring filename."""
-        return "ceph.client." + self.backend_name + ".keyring"
-
-    def ceph_conf(self) -> str:
-        """Return the ceph config filename."""
-        return self.backend_name + ".conf"
-
-    def context(self) -> typing.Mapping[str, typing.Any]:
-        """Return full context for Ceph backend."""
-        context = dict(super().context())
-        context["volume_driver"] = "cinder.volume.drivers.rbd.RBDDriver"
-        context["rbd_ceph_conf"] = (
-            r"{{ snap_paths.common }}/etc/ceph/" + self.ceph_conf()
-        )
-        context["keyring"] = self.keyring()
-        return context
-
-    def directories(self) -> list[template.Directory]:
+    def build_directories(self) -> list[template.Directory]:
         """Return directories to create."""
-        return [
+        return super().build_directories() + [
             template.CommonDirectory(ETC_CEPH),
         ]
 
-    def template_files(self) -> list[template.Template]:
+    def build_template_files(self) -> list[template.Template]:
         """Return template files to render."""
-        return super().template_files() + [
+        return super().build_template_files() + [
             template.CommonTemplate(
                 self.ceph_conf(), ETC_CEPH, template_name="ceph.conf.j2"
             ),
@@ -257,10 +379,32 @@ class CephBackendContext(BaseBackendContext):
             ),
         ]
 
+    def keyring(self) -> str:
+        """Return the keyring filename."""
+        return "ceph.client." + self.backend_name + ".keyring"
+
+    def ceph_conf(self) -> str:
+        """Return the ceph config filename."""
+        return self.backend_name + ".conf"
+
+    def _build_context(self) -> typing.MutableMapping[str, typing.Any]:
+        """Build full context for Ceph backend."""
+        return collections.ChainMap(
+            {
+                "volume_driver": "cinder.volume.drivers.rbd.RBDDriver",
+                "rbd_ceph_conf": r"{{ snap_paths.common }}/etc/ceph/"
+                + self.ceph_conf(),
+                "keyring": self.keyring(),
+            },
+            super()._build_context(),
+        )
+
 
 class HitachiBackendContext(BaseBackendContext):
     """Render a Hitachi VSP backend stanza."""
 
+    __slots__ = ()
+
     _hidden_keys = ("protocol", "hitachi_mirror_driver_ssl_cert")
 
     def __init__(self, backend_name: str, backend_config: dict):
@@ -268,36 +412,9 @@ class HitachiBackendContext(BaseBackendContext):
         super().__init__(backend_name, backend_config)
         self.supports_cluster = False
 
-    def context(self) -> dict:
-        """Return context for Hitachi backend."""
-        context = dict(super().context())
-        proto = self.backend_config.get("protocol", "FC").lower()
-        driver_cls = (
-            "cinder.volume.drivers.hitachi.hbsd_fc.HBSDFCDriver"
-            if proto == "fc"
-            else "cinder.volume.drivers.hitachi.hbsd_iscsi.HBSDISCSIDriver"
-        )
-        context.update(
-            {
-                "volume_driver": driver_cls,
-            }
-        )
-        if "chap_username" in context:
-            context["use_chap_auth"] = True
-        if "hitachi_mirror_auth_username" in context:
-            context["hitachi_mirror_use_chap_auth"] = True
-        if context.get("hitachi_mirror_driver_ssl_cert"):
-            context["hitachi_mirror_ssl_cert_path"] = str(
-                pathlib.Path(r"{{ snap_paths.common }}")
-                / ETC_CINDER_D_CONF_DIR
-                / f"{self.backend_name}_mirror.pem"
-            )
-            context["hitachi_mirror_ssl_cert_verify"] = True
-        return context
-
-    def template_files(self) -> list[template.Template]:
+    def build_template_files(self) -> list[template.Template]:
         """Files to be templated."""
-        return super().template_files() + [
+        return super().build_template_files() + [
             template.CommonTemplate(
                 f"{self.backend_name}_mirror.pem",
                 ETC_CINDER_D_CONF_DIR,
@@ -313,10 +430,45 @@ class HitachiBackendContext(BaseBackendContext):
             ),
         ]
 
+    def _build_context(self) -> typing.MutableMapping[str, typing.Any]:
+        """Build context for Hitachi backend."""
+        base = super()._build_context()
+        proto = self.backend_config.get("protocol", "fc")
+        driver_cls = (
+            "cinder.volume.drivers.hitachi.hbsd_fc.HBSDFCDriver"
+            if proto == "fc"
+            else "cinder.volume.drivers.hitachi.hbsd_iscsi.HBSDISCSIDriver"
+        )
+        context: dict[str, typing.Any] = {
+            "volume_driver": driver_cls,
+        }
+        if "chap_username" in base:
+            context["use_chap_auth"] = True
+        if "hitachi_mirror_auth_username" in base:
+            context["hitachi_mirror_use_chap_auth"] = True
+        if base.get("hitachi_mirror_driver_ssl_cert"):
+            context["hitachi_mirror_ssl_cert_path"] = _MIRROR_PEM_TMPL.format(
+                name=self.backend_name
+            )
+            context["hitachi_mirror_ssl_cert_verify"] = True
+        return collections.ChainMap(context, base)
+
+
+# Driver class selection based on protocol
+_PURE_DRIVERS: typing.Mapping[str, str] = types.MappingProxyType(
+    {
+        "iscsi": "cinder.volume.drivers.pure.PureISCSIDriver",
+        "fc": "cinder.volume.drivers.pure.PureFCDriver",
+        "nvme": "cinder.volume.drivers.pure.PureNVMEDriver",
+    }
+)
+
 
 class PureBackendContext(BaseBackendContext):
     """Render a Pure Storage FlashArray backend stanza."""
 
+    __slots__ = ()
+
     _hidden_keys = ("protocol",)
 
     def __init__(self, backend_name: str, backend_config: dict):
@@ -324,31 +476,28 @@ class PureBackendContext(BaseBackendContext):
         super().__init__(backend_name, backend_config)
         self.supports_cluster = True  # Pure supports clustering
 
-    def context(self) -> dict:
-        """Return context for Pure backend."""
-        context = dict(super().context())
-        protocol = self.backend_config.get("protocol", "fc").lower()
+    def _build_context(self) -> typing.MutableMapping[str, typing.Any]:
+        """Build context for Pure backend."""
+        protocol = self.backend_config.get("protocol", "fc")
+        driver_class = _PURE_DRIVERS.get(protocol, _PURE_DRIVERS["fc"])
+        return collections.ChainMap(
+            {"volume_driver": driver_class}, super()._build_context()
+        )
 
-        # Driver class selection based on protocol
-        driver_classes = {
-            "iscsi": "cinder.volume.drivers.pure.PureISCSIDriver",
-            "fc": "cinder.volume.drivers.pure.PureFCDriver",
-            "nvme": "cinder.volume.drivers.pure.PureNVMEDriver",
-        }
 
-        driver_class = driver_classes.get(protocol, driver_classes["fc"])
-
-        context.update(
-            {
-                "volume_driver": driver_class,
-            }
-        )
-        return context
+_DELLSC_DRIVERS: typing.Mapping[str, str] = types.MappingProxyType(
+    {
+        "iscsi": "cinder.volume.drivers.dell_emc.sc.storagecenter_iscsi.SCISCSIDriver",
+        "fc": "cinder.volume.drivers.dell_emc.sc.storagecenter_fc.SCFCDriver",
+    }
+)
 
 
 class DellscBackendContext(BaseBackendContext):
     """Render a Dell Storage Center backend stanza."""
 
+    __slots__ = ()
+
     _hidden_keys = ("protocol",)
 
     def __init__(self, backend_name: str, backend_config: dict):
@@ -356,32 +505,20 @@ class DellscBackendContext(BaseBackendContext):
         super().__init__(backend_name, backend_config)
         self.supports_cluster = False  # Dell SC does not support clustering
 
-    def context(self) -> dict:
-        """Return context for Dell SC backend."""
-        context = dict(super().context())
-        protocol = self.backend_config.get("protocol", "fc").lower()
-
-        # Driver class selection based on protocol
-        driver_classes = {
-            "iscsi": (
-                "cinder.volume.drivers.dell_emc.sc.storagecenter_iscsi.SCISCSIDriver"
-            ),
-            "fc": "cinder.volume.drivers.dell_emc.sc.storagecenter_fc.SCFCDriver",
-        }
-
-        driver_class = driver_classes.get(protocol, driver_classes["fc"])
-
-        context.update(
-            {
-                "volume_driver": driver_class,
-            }
+    def _build_context(self) -> typing.MutableMapping[str, typing.Any]:
+        """Build context for Dell SC backend."""
+        protocol = self.backend_config.get("protocol", "fc")
+        driver_class = _DELLSC_DRIVERS.get(protocol, _DELLSC_DRIVERS["fc"])
+        return collections.ChainMap(
+            {"volume_driver": driver_class}, super()._build_context()
         )
-        return context
 
 
 class DellpowerstoreBackendContext(BaseBackendContext):
     """Render a Dell PowerStore backend stanza."""
 
+    __slots__ = ()
+
     _hidden_keys = ("protocol",)
 
     def __init__(self, backend_name: str, backend_config: dict):
@@ -389,20 +526,18 @@ class DellpowerstoreBackendContext(BaseBackendContext):
         super().__init__(backend_name, backend_config)
         self.supports_cluster = False
 
-    def context(self) -> dict:
-        """Return context for Dell PowerStore backend."""
-        context = dict(super().context())
-
+    def _build_context(self) -> typing.MutableMapping[str, typing.Any]:
+        """Build context for Dell PowerStore backend."""
         # Driver class selection
         # Note that the class doesn't change across the configured protocols
         driver_class = (
             "cinder.volume.drivers.dell_emc.powerstore.driver.PowerStoreDriver"
         )
 
-        context.update(
+        return collections.ChainMap(
             {
                 "volume_driver": driver_class,
-                "storage_protocol": self.backend_config.get("protocol", "fc").lower(),
-            }
+                "storage_protocol": self.backend_config.get("protocol", "fc"),
+            },
+            super()._build_context(),
         )
-        return context
@@ -7,83 +7,253 @@ These tests verify that backend configurations are correctly templated
 and rendered into Cinder configuration files.
 """
 
-from unittest.mock import Mock, patch
+import re
+import types
 
 import jinja2
 import pytest
 
-from cinder_volume import context, error
+from cinder_volume import configuration, context, error, template
+
+_RE_AT_LEAST_ONE = re.compile("At least one backend")
+_RE_MISSING_CONTEXTS = re.compile("Context missing configuration for backends")
+_RE_NO_BACKEND_NAME = re.compile("No backend name in context")
+
+_BACKEND_CONF_J2 = """[{{ cinder_name() }}]
+{%- for key, value in cinder_ctx().items() %}
+{{ key }} = {{ value }}
+{%- endfor %}
+"""
+
+
+@pytest.fixture(scope="module")
+def jinja_env():
+    """Jinja2 environment shared by the rendering tests."""
+    env = jinja2.Environment(
+        loader=jinja2.DictLoader({"backend.conf.j2": _BACKEND_CONF_J2}),
+        # The template source never changes during the tests
+        auto_reload=False,
+        cache_size=-1,
+    )
+    env.globals.update(
+        {
+            "cinder_name": context.cinder_name,
+            "cinder_ctx": context.cinder_ctx,
+        }
+    )
+    return env
+
+
+@pytest.fixture(scope="module")
+def backend_conf(jinja_env):
+    """Compiled backend.conf.j2 template shared by the rendering tests."""
+    return jinja_env.get_template("backend.conf.j2")
+
+
+@pytest.fixture(scope="module")
+def base_ctx_factory():
+    """Build base backend contexts named test-backend."""
+
+    def _make(backend_config=None):
+        return context.BaseBackendContext("test-backend", backend_config or {})
+
+    return _make
+
+
+@pytest.fixture(scope="module")
+def backend_ctx_builder():
+    """Build render contexts holding the cinder context of test-backend."""
+
+    def _build(**values):
+        return {"cinder_backends": {"contexts": {"test-backend": values}}}
+
+    return _build
+
+
+@pytest.fixture(scope="module")
+def two_backends():
+    """Two base backend contexts, shared by the tests of a module."""
+    return {
+        "backend1": context.BaseBackendContext(
+            "backend1", {"volume_backend_name": "b1"}
+        ),
+        "backend2": context.BaseBackendContext(
+            "backend2", {"volume_backend_name": "b2"}
+        ),
+    }
+
+
+@pytest.fixture(scope="module")
+def cbc(two_backends):
+    """Cinder backend contexts enabling both shared backends."""
+    return context.CinderBackendContexts(["backend1", "backend2"], two_backends)
 
 
 class TestBaseBackendContext:
     """Test the BaseBackendContext class and its templating logic."""
 
-    def test_base_backend_context_creation(self):
+    def test_base_backend_context_creation(self, base_ctx_factory):
         """Test creating a BaseBackendContext instance."""
         backend_config = {
             "volume_backend_name": "test-backend",
             "volume_dd_blocksize": 4096,
         }
-        ctx = context.BaseBackendContext("test-backend", backend_config)
+        ctx = base_ctx_factory(backend_config)
         assert ctx.namespace == "test-backend"
         assert ctx.backend_name == "test-backend"
         assert ctx.backend_config == backend_config
-        assert ctx.supports_cluster is True
+        assert ctx.supports_cluster
+
+    def test_base_backend_context_from_model(self):
+        """Test creating a backend context from a validated configuration."""
+        config = configuration.PureConfiguration(
+            **{
+                "volume-backend-name": "pure1",
+                "san-ip": "10.0.0.10",
+                "pure-api-token": "token",
+            }
+        )
+        ctx = context.PureBackendContext.from_model("pure1", config)
+        assert isinstance(ctx, context.PureBackendContext)
+        assert ctx.backend_name == "pure1"
+        assert ctx.backend_config == config.model_dump()
 
-    def test_base_backend_context_context_method(self):
+    def test_base_backend_context_context_method(self, base_ctx_factory):
         """Test the context method returns backend config."""
         backend_config = {
             "volume_backend_name": "test-backend",
             "volume_dd_blocksize": 4096,
             "custom_option": "value",
         }
-        ctx = context.BaseBackendContext("test-backend", backend_config)
+        ctx = base_ctx_factory(backend_config)
         result = ctx.context()
         assert result == backend_config
 
-    def test_base_backend_context_with_driver_ssl_cert(self):
+    def test_backend_context_layers_without_copy(self):
+        """Test context additions are layered over the backend configuration."""
+        backend_config = {"volume_backend_name": "ceph1", "rbd_pool": "volumes"}
+        ctx = context.CephBackendContext("ceph1", backend_config)
+        result = ctx.context()
+
+        assert context.BaseBackendContext("b", backend_config).context() is (
+            backend_config
+        )
+        assert result["rbd_pool"] == "volumes"
+        assert result["keyring"] == "ceph.client.ceph1.keyring"
+        assert "keyring" not in backend_config
+
+    def test_base_backend_context_with_driver_ssl_cert(self, base_ctx_factory):
         """Test context method with driver_ssl_cert adds path and verify."""
         backend_config = {
             "volume_backend_name": "test-backend",
             "driver_ssl_cert": "-----BEGIN CERTIFICATE-----\n...",
         }
-        ctx = context.BaseBackendContext("test-backend", backend_config)
+        ctx = base_ctx_factory(backend_config)
         result = ctx.context()
 
         assert "driver_ssl_cert_path" in result
-        assert "test-backend.pem" in result["driver_ssl_cert_path"]
+        assert result["driver_ssl_cert_path"] == (
+            "{{ snap_paths.common }}/etc/cinder/cinder.conf.d/test-backend.pem"
+        )
         assert result["driver_ssl_cert_verify"] is True
 
-    def test_base_backend_cinder_context_removes_hidden_keys(self):
+    def test_base_backend_cinder_context_removes_hidden_keys(self, base_ctx_factory):
         """Test cinder_context removes hidden keys like driver_ssl_cert."""
         backend_config = {
             "volume_backend_name": "test-backend",
             "driver_ssl_cert": "cert-content",
             "volume_dd_blocksize": 4096,
         }
-        ctx = context.BaseBackendContext("test-backend", backend_config)
+        ctx = base_ctx_factory(backend_config)
         result = ctx.cinder_context()
 
         assert "driver_ssl_cert" not in result
         assert result["volume_backend_name"] == "test-backend"
         assert result["volume_dd_blocksize"] == 4096
 
-    def test_base_backend_cinder_context_filters_none_values(self):
+    def test_backend_hidden_keys_include_parents(self):
+        """Test hidden keys combine the keys of the class hierarchy."""
+        ctx = context.CephBackendContext("ceph", {})
+        assert ctx.hidden_keys == {
+            "driver_ssl_cert",
+            "rbd_key",
+            "keyring",
+            "mon_hosts",
+            "auth",
+        }
+        assert context.BaseBackendContext("base", {}).hidden_keys == {"driver_ssl_cert"}
+
+    def test_base_backend_cinder_context_filters_none_values(self, base_ctx_factory):
         """Test cinder_context filters out None values."""
         backend_config = {
             "volume_backend_name": "test-backend",
             "image_volume_cache_enabled": None,
             "volume_dd_blocksize": 4096,
         }
-        ctx = context.BaseBackendContext("test-backend", backend_config)
+        ctx = base_ctx_factory(backend_config)
         result = ctx.cinder_context()
 
         assert "image_volume_cache_enabled" not in result
         assert "volume_dd_blocksize" in result
 
-    def test_base_backend_template_files(self):
+    def test_backend_context_computed_once(self):
+        """Test the full override context is computed once and reused."""
+        ctx = context.CephBackendContext("ceph1", {"rbd_pool": "volumes"})
+        result = ctx.context()
+
+        assert ctx.context() is result
+        assert result["keyring"] == "ceph.client.ceph1.keyring"
+        assert ctx.cinder_context() is ctx.cinder_context()
+        assert "keyring" not in ctx.cinder_context()
+
+    def test_backend_context_independent_of_call_order(self):
+        """Test that a parent context built first does not shadow overrides."""
+
+        class CustomContext(context.CephBackendContext):
+            __slots__ = ()
+
+            def parent_keys(self):
+                return set(super().context())
+
+        ctx = CustomContext("ceph1", {"rbd_pool": "volumes"})
+        ctx.parent_keys()
+
+        assert ctx.context()["volume_driver"] == "cinder.volume.drivers.rbd.RBDDriver"
+
+    @pytest.mark.parametrize(
+        "context_class,expected",
+        [
+            (
+                context.PureBackendContext,
+                {"volume_driver": "cinder.volume.drivers.pure.PureISCSIDriver"},
+            ),
+            (
+                context.HitachiBackendContext,
+                {
+                    "volume_driver": (
+                        "cinder.volume.drivers.hitachi.hbsd_iscsi.HBSDISCSIDriver"
+                    )
+                },
+            ),
+            (context.DellpowerstoreBackendContext, {"storage_protocol": "iscsi"}),
+        ],
+    )
+    def test_backend_context_normalizes_protocol(self, context_class, expected):
+        """Test that contexts built without a model lowercase the protocol."""
+        backend_config = {"volume_backend_name": "b1", "protocol": "ISCSI"}
+        result = context_class("b1", backend_config).context()
+
+        assert expected.items() <= result.items()
+        assert backend_config["protocol"] == "ISCSI"
+
+    def test_backend_contexts_use_slots(self):
+        """Test backend contexts do not carry a per-instance __dict__."""
+        ctx = context.CephBackendContext("ceph1", {})
+        assert not hasattr(ctx, "__dict__")
+
+    def test_base_backend_template_files(self, base_ctx_factory):
         """Test template_files returns expected templates."""
-        ctx = context.BaseBackendContext("test-backend", {})
+        ctx = base_ctx_factory()
         templates = ctx.template_files()
 
         assert len(templates) == 2
@@ -91,83 +261,103 @@ class TestBaseBackendContext:
         assert templates[0].template_name == "backend.conf.j2"
         assert templates[1].filename == "test-backend.pem"
         assert templates[1].template_name == "backend.pem.j2"
+        assert ctx.template_files() is templates
 
-    def test_base_backend_pem_template_conditional(self):
+    def test_base_backend_pem_template_conditional(
+        self, base_ctx_factory, backend_ctx_builder
+    ):
         """Test that .pem template has conditional for driver_ssl_cert_path."""
-        ctx = context.BaseBackendContext("test-backend", {})
+        ctx = base_ctx_factory()
         templates = ctx.template_files()
         pem_template = templates[1]
 
         assert len(pem_template.conditionals) > 0
 
         # Test conditional returns False when cert not present
-        test_context = {"cinder_backends": {"contexts": {"test-backend": {}}}}
+        test_context = backend_ctx_builder()
         assert not all(cond(test_context) for cond in pem_template.conditionals)
 
         # Test conditional returns True when cert is present
-        test_context_with_cert = {
-            "cinder_backends": {
-                "contexts": {"test-backend": {"driver_ssl_cert_path": "/path/to/cert"}}
-            }
-        }
+        test_context_with_cert = backend_ctx_builder(
+            driver_ssl_cert_path="/path/to/cert"
+        )
         assert all(cond(test_context_with_cert) for cond in pem_template.conditionals)
 
-    def test_base_backend_directories(self):
-        """Test directories returns empty list for base backend."""
-        ctx = context.BaseBackendContext("test-backend", {})
+    def test_base_backend_directories(self, base_ctx_factory):
+        """Test directories returns an empty list for base backend."""
+        ctx = base_ctx_factory()
         assert ctx.directories() == []
 
-    def test_base_backend_setup(self):
+    def test_backend_descriptors_extended_by_subclass(self):
+        """Test that subclasses extend the descriptors built once per context."""
+
+        class CustomContext(context.CephBackendContext):
+            __slots__ = ()
+
+            def build_template_files(self):
+                return super().build_template_files() + [
+                    template.CommonTemplate("custom.conf", context.ETC_CEPH)
+                ]
+
+            def directories(self):
+                return super().directories() + [
+                    template.CommonDirectory(context.ETC_CINDER_D_CONF_DIR)
+                ]
+
+        ctx = CustomContext("ceph1", {})
+        templates = ctx.template_files()
+
+        assert [tpl.filename for tpl in templates] == [
+            "ceph1.conf",
+            "ceph1.pem",
+            "ceph1.conf",
+            "ceph.client.ceph1.keyring",
+            "custom.conf",
+        ]
+        assert ctx.template_files() is templates
+        assert [d.path for d in ctx.directories()] == [
+            context.ETC_CEPH,
+            context.ETC_CINDER_D_CONF_DIR,
+        ]
+
+    def test_base_backend_setup(self, base_ctx_factory):
         """Test setup method does nothing for base backend."""
-        ctx = context.BaseBackendContext("test-backend", {})
-        mock_snap = Mock()
-        # Should not raise any errors
-        ctx.setup(mock_snap)
+        ctx = base_ctx_factory()
+        # Should not raise any errors, nor touch the snap
+        ctx.setup(types.SimpleNamespace())
 
 
 class TestCinderBackendContexts:
     """Test the CinderBackendContexts class for managing multiple backends."""
 
-    def test_cinder_backend_contexts_creation(self):
+    def test_cinder_backend_contexts_creation(self, cbc, two_backends):
         """Test creating a CinderBackendContexts instance."""
-        ctx1 = context.BaseBackendContext("backend1", {"volume_backend_name": "b1"})
-        ctx2 = context.BaseBackendContext("backend2", {"volume_backend_name": "b2"})
-        contexts = {"backend1": ctx1, "backend2": ctx2}
-
-        cbc = context.CinderBackendContexts(["backend1", "backend2"], contexts)
         assert cbc.namespace == "cinder_backends"
         assert cbc.enabled_backends == ["backend1", "backend2"]
-        assert cbc.contexts == contexts
+        assert cbc.contexts == two_backends
 
     def test_cinder_backend_contexts_requires_enabled_backends(self):
         """Test that at least one backend must be enabled."""
-        with pytest.raises(error.CinderError, match="At least one backend"):
+        with pytest.raises(error.CinderError, match=_RE_AT_LEAST_ONE):
             context.CinderBackendContexts([], {})
 
-    def test_cinder_backend_contexts_validates_missing_contexts(self):
+    def test_cinder_backend_contexts_validates_missing_contexts(self, two_backends):
         """Test that all enabled backends must have contexts."""
-        ctx1 = context.BaseBackendContext("backend1", {"volume_backend_name": "b1"})
-        contexts = {"backend1": ctx1}
+        contexts = {"backend1": two_backends["backend1"]}
 
-        with pytest.raises(
-            error.CinderError, match="Context missing configuration for backends"
-        ):
+        with pytest.raises(error.CinderError, match=_RE_MISSING_CONTEXTS):
             context.CinderBackendContexts(["backend1", "backend2"], contexts)
 
-    def test_cinder_backend_contexts_context_method(self):
+    def test_cinder_backend_contexts_context_method(self, cbc):
         """Test the context method returns enabled_backends and cluster_ok."""
-        ctx1 = context.BaseBackendContext("backend1", {"volume_backend_name": "b1"})
-        ctx2 = context.BaseBackendContext("backend2", {"volume_backend_name": "b2"})
-        contexts = {"backend1": ctx1, "backend2": ctx2}
-
-        cbc = context.CinderBackendContexts(["backend1", "backend2"], contexts)
         result = cbc.context()
 
         assert result["enabled_backends"] == "backend1,backend2"
-        assert result["cluster_ok"] is True
+        assert result["cluster_ok"]
         assert "contexts" in result
         assert "backend1" in result["contexts"]
         assert "backend2" in result["contexts"]
+        assert cbc.context() is result
 
     def test_cinder_backend_contexts_cluster_ok_false_when_unsupported(self):
         """Test that cluster_ok is False when any backend doesn't support clustering."""
@@ -180,7 +370,8 @@ class TestCinderBackendContexts:
         cbc = context.CinderBackendContexts(["backend1", "backend2"], contexts)
         result = cbc.context()
 
-        assert result["cluster_ok"] is False
+        assert not result["cluster_ok"]
+        assert not cbc.cluster_ok
 
     def test_cinder_backend_contexts_cluster_ok_true_when_all_supported(self):
         """Test that cluster_ok is True when all backends support clustering."""
@@ -191,199 +382,155 @@ class TestCinderBackendContexts:
         cbc = context.CinderBackendContexts(["backend1", "backend2"], contexts)
         result = cbc.context()
 
-        assert result["cluster_ok"] is True
-
+        assert result["cluster_ok"]
 
-class TestBackendTemplateRendering:
-    """Test backend template rendering with Jinja2."""
-
-    def test_backend_conf_template_renders(self):
-        """Test that backend.conf.j2 template renders correctly."""
-        # Create a Jinja2 environment with the template
-        template_str = """[{{ cinder_name() }}]
-{%- for key, value in cinder_ctx().items() %}
-{{ key }} = {{ value }}
-{%- endfor %}
-"""
-        env = jinja2.Environment(
-            loader=jinja2.DictLoader({"backend.conf.j2": template_str})
-        )
-        env.globals.update(
-            {
-                "cinder_name": context.cinder_name,
-                "cinder_ctx": context.cinder_ctx,
-            }
-        )
-
-        # Create test context
-        test_context = {
-            context.CINDER_CTX_KEY: "test-backend",
-            "cinder_backends": {
-                "contexts": {
-                    "test-backend": {
-                        "volume_driver": "test.driver",
-                        "volume_backend_name": "test-backend",
-                        "san_ip": "10.0.0.1",
-                    }
-                }
-            },
-        }
-
-        template = env.get_template("backend.conf.j2")
-        rendered = template.render(**test_context)
-
-        assert "[test-backend]" in rendered
-        assert "volume_driver = test.driver" in rendered
-        assert "volume_backend_name = test-backend" in rendered
-        assert "san_ip = 10.0.0.1" in rendered
-
-    def test_backend_conf_template_with_ceph(self):
-        """Test rendering Ceph backend configuration."""
-        template_str = """[{{ cinder_name() }}]
-{%- for key, value in cinder_ctx().items() %}
-{{ key }} = {{ value }}
-{%- endfor %}
-"""
-        env = jinja2.Environment(
-            loader=jinja2.DictLoader({"backend.conf.j2": template_str})
-        )
-        env.globals.update(
-            {
-                "cinder_name": context.cinder_name,
-                "cinder_ctx": context.cinder_ctx,
-            }
-        )
+    def test_cinder_backend_contexts_cluster_ok_ignores_disabled(self):
+        """Test that disabled backends do not prevent clustering."""
+        ctx1 = context.CephBackendContext("backend1", {"volume_backend_name": "b1"})
+        ctx2 = context.HitachiBackendContext("backend2", {"volume_backend_name": "b2"})
+        contexts = {"backend1": ctx1, "backend2": ctx2}
 
-        # Create Ceph backend context
-        ceph_ctx = context.CephBackendContext(
-            "ceph-rbd",
-            {
-                "volume_backend_name": "ceph-rbd",
-                "rbd_pool": "cinder-volumes",
-                "rbd_user": "cinder",
-                "rbd_key": "secret-key",  # Should be hidden
-            },
-        )
+        cbc = context.CinderBackendContexts(["backend1"], contexts)
 
-        test_context = {
-            context.CINDER_CTX_KEY: "ceph-rbd",
-            "cinder_backends": {"contexts": {"ceph-rbd": ceph_ctx.cinder_context()}},
-        }
+        assert cbc.cluster_ok
 
-        template = env.get_template("backend.conf.j2")
-        rendered = template.render(**test_context)
 
-        assert "[ceph-rbd]" in rendered
-        assert "volume_driver = cinder.volume.drivers.rbd.RBDDriver" in rendered
-        assert "rbd_pool = cinder-volumes" in rendered
-        # Sensitive key should not appear
-        assert "rbd_key" not in rendered
+def _ceph_backends():
+    ceph_ctx = context.CephBackendContext(
+        "ceph-rbd",
+        {
+            "volume_backend_name": "ceph-rbd",
+            "rbd_pool": "cinder-volumes",
+            "rbd_user": "cinder",
+            "rbd_key": "secret-key",  # Should be hidden
+        },
+    )
+    return {"contexts": {"ceph-rbd": ceph_ctx.cinder_context()}}
 
-    def test_multiple_backends_rendered_separately(self):
-        """Test that multiple backends are rendered as separate config sections."""
-        template_str = """[{{ cinder_name() }}]
-{%- for key, value in cinder_ctx().items() %}
-{{ key }} = {{ value }}
-{%- endfor %}
-"""
-        env = jinja2.Environment(
-            loader=jinja2.DictLoader({"backend.conf.j2": template_str})
-        )
-        env.globals.update(
-            {
-                "cinder_name": context.cinder_name,
-                "cinder_ctx": context.cinder_ctx,
-            }
-        )
 
-        # Create multiple backend contexts
-        ceph_ctx = context.CephBackendContext(
+def _multi_backends():
+    backends = {
+        "ceph-rbd": context.CephBackendContext(
             "ceph-rbd", {"volume_backend_name": "ceph-rbd"}
-        )
-        pure_ctx = context.PureBackendContext(
+        ),
+        "pure-fc": context.PureBackendContext(
             "pure-fc", {"volume_backend_name": "pure-fc", "protocol": "fc"}
-        )
+        ),
+    }
+    return context.CinderBackendContexts(["ceph-rbd", "pure-fc"], backends).context()
 
-        backends = {"ceph-rbd": ceph_ctx, "pure-fc": pure_ctx}
-        cinder_backends = context.CinderBackendContexts(
-            ["ceph-rbd", "pure-fc"], backends
-        )
 
-        # Render each backend separately (as the main code does)
-        renderings = []
-        for backend_name, backend_ctx in backends.items():
-            test_context = {
+class TestBackendTemplateRendering:
+    """Test backend template rendering with Jinja2."""
+
+    @pytest.mark.parametrize(
+        "backend_name,cinder_backends,expected,unexpected",
+        [
+            pytest.param(
+                "test-backend",
+                {
+                    "contexts": {
+                        "test-backend": {
+                            "volume_driver": "test.driver",
+                            "volume_backend_name": "test-backend",
+                            "san_ip": "10.0.0.1",
+                        }
+                    }
+                },
+                [
+                    "[test-backend]",
+                    "volume_driver = test.driver",
+                    "volume_backend_name = test-backend",
+                    "san_ip = 10.0.0.1",
+                ],
+                [],
+                id="plain",
+            ),
+            pytest.param(
+                "ceph-rbd",
+                _ceph_backends(),
+                [
+                    "[ceph-rbd]",
+                    "volume_driver = cinder.volume.drivers.rbd.RBDDriver",
+                    "rbd_pool = cinder-volumes",
+                ],
+                # Sensitive key should not appear
+                ["rbd_key"],
+                id="ceph",
+            ),
+            # Each backend is rendered separately, as the main code does
+            pytest.param(
+                "ceph-rbd",
+                _multi_backends(),
+                ["[ceph-rbd]", "cinder.volume.drivers.rbd.RBDDriver"],
+                ["[pure-fc]"],
+                id="multiple-ceph",
+            ),
+            pytest.param(
+                "pure-fc",
+                _multi_backends(),
+                ["[pure-fc]", "cinder.volume.drivers.pure.PureFCDriver"],
+                ["[ceph-rbd]"],
+                id="multiple-pure",
+            ),
+        ],
+    )
+    def test_backend_conf_template_renders(
+        self, backend_conf, backend_name, cinder_backends, expected, unexpected
+    ):
+        """Test that backend.conf.j2 renders the section of one backend."""
+        rendered = backend_conf.render(
+            **{
                 context.CINDER_CTX_KEY: backend_name,
-                "cinder_backends": cinder_backends.context(),
+                "cinder_backends": cinder_backends,
             }
-            template = env.get_template("backend.conf.j2")
-            rendered = template.render(**test_context)
-            renderings.append(rendered)
-
-        # Check first backend (Ceph)
-        assert "[ceph-rbd]" in renderings[0]
-        assert "cinder.volume.drivers.rbd.RBDDriver" in renderings[0]
+        )
 
-        # Check second backend (Pure)
-        assert "[pure-fc]" in renderings[1]
-        assert "cinder.volume.drivers.pure.PureFCDriver" in renderings[1]
+        for line in expected:
+            assert line in rendered
+        for line in unexpected:
+            assert line not in rendered
 
 
 class TestBackendConditionals:
     """Test conditional logic for backend templates."""
 
-    def test_backend_variable_set_conditional(self):
+    def test_backend_variable_set_conditional(self, backend_ctx_builder):
         """Test backend_variable_set conditional function."""
         conditional = context.backend_variable_set(
             "test-backend", "san_ip", "san_login"
         )
 
         # Test with all variables set
-        ctx_all_set = {
-            "cinder_backends": {
-                "contexts": {
-                    "test-backend": {"san_ip": "10.0.0.1", "san_login": "admin"}
-                }
-            }
-        }
-        assert conditional(ctx_all_set) is True
+        ctx_all_set = backend_ctx_builder(san_ip="10.0.0.1", san_login="admin")
+        assert conditional(ctx_all_set)
 
         # Test with one variable missing
-        ctx_one_missing = {
-            "cinder_backends": {"contexts": {"test-backend": {"san_ip": "10.0.0.1"}}}
-        }
-        assert conditional(ctx_one_missing) is False
+        ctx_one_missing = backend_ctx_builder(san_ip="10.0.0.1")
+        assert not conditional(ctx_one_missing)
 
         # Test with backend missing
         ctx_backend_missing = {"cinder_backends": {"contexts": {}}}
-        assert conditional(ctx_backend_missing) is False
+        assert not conditional(ctx_backend_missing)
 
-    def test_backend_variable_set_with_empty_string(self):
+    def test_backend_variable_set_with_empty_string(self, backend_ctx_builder):
         """Test that empty string is treated as False."""
         conditional = context.backend_variable_set("test-backend", "san_ip")
 
-        ctx_empty = {"cinder_backends": {"contexts": {"test-backend": {"san_ip": ""}}}}
-        assert conditional(ctx_empty) is False
+        ctx_empty = backend_ctx_builder(san_ip="")
+        assert not conditional(ctx_empty)
 
-    def test_backend_variable_set_with_multiple_variables(self):
+    def test_backend_variable_set_with_multiple_variables(self, backend_ctx_builder):
         """Test conditional with multiple variables."""
         conditional = context.backend_variable_set(
             "test-backend", "var1", "var2", "var3"
         )
 
-        ctx_all_present = {
-            "cinder_backends": {
-                "contexts": {"test-backend": {"var1": "a", "var2": "b", "var3": "c"}}
-            }
-        }
-        assert conditional(ctx_all_present) is True
+        ctx_all_present = backend_ctx_builder(var1="a", var2="b", var3="c")
+        assert conditional(ctx_all_present)
 
-        ctx_one_false = {
-            "cinder_backends": {
-                "contexts": {"test-backend": {"var1": "a", "var2": False, "var3": "c"}}
-            }
-        }
-        assert conditional(ctx_one_false) is False
+        ctx_one_false = backend_ctx_builder(var1="a", var2=False, var3="c")
+        assert not conditional(ctx_one_false)
 
 
 class TestJinjaHelperFunctions:
@@ -391,18 +538,14 @@ class TestJinjaHelperFunctions:
 
     def test_cinder_name_function(self):
         """Test cinder_name helper function."""
-        mock_ctx = {context.CINDER_CTX_KEY: "my-backend"}
-
-        # Mock the jinja2 context
-        with patch("jinja2.runtime.Context", return_value=mock_ctx):
-            result = context.cinder_name(mock_ctx)
-            assert result == "my-backend"
+        result = context.cinder_name({context.CINDER_CTX_KEY: "my-backend"})
+        assert result == "my-backend"
 
     def test_cinder_name_raises_without_key(self):
         """Test cinder_name raises error when key is missing."""
         mock_ctx = {}
 
-        with pytest.raises(error.CinderError, match="No backend name in context"):
+        with pytest.raises(error.CinderError, match=_RE_NO_BACKEND_NAME):
             context.cinder_name(mock_ctx)
 
     def test_cinder_ctx_function(self):
@@ -417,6 +560,11 @@ class TestJinjaHelperFunctions:
         result = context.cinder_ctx(mock_ctx)
         assert result == {"volume_driver": "test.driver"}
 
+    def test_cinder_ctx_raises_without_key(self):
+        """Test cinder_ctx raises error when the backend name is missing."""
+        with pytest.raises(error.CinderError, match=_RE_NO_BACKEND_NAME):
+            context.cinder_ctx({"cinder_backends": {"contexts": {}}})
+
     def test_backend_ctx_function(self):
         """Test backend_ctx helper function."""
         mock_ctx = {
@@ -425,3 +573,17 @@ class TestJinjaHelperFunctions:
 
         result = context.backend_ctx(mock_ctx)
         assert result == {"san_ip": "10.0.0.1", "san_login": "admin"}
+
+    def test_helpers_use_backend_namespace(self):
+        """Test helpers resolve from the precomputed backend namespace."""
+        cinder = {"volume_driver": "test.driver"}
+        backend = {"san_ip": "10.0.0.1"}
+        mock_ctx = {
+            context.BACKEND_NS_KEY: context.backend_namespace(
+                "my-backend", cinder, backend
+            )
+        }
+
+        assert context.cinder_name(mock_ctx) == "my-backend"
+        assert context.cinder_ctx(mock_ctx) is cinder
+        assert context.backend_ctx(mock_ctx) is backend
@@ -1,11 +1,74 @@
 # SPDX-FileCopyrightText: 2025 - Canonical Ltd
 # SPDX-License-Identifier: Apache-2.0
 
+import json
+import re
+import types
+
 import pydantic
 import pytest
+from pydantic.alias_generators import to_snake
 
 from cinder_volume import configuration
 
+_RE_DUPLICATE_NAME = re.compile("Duplicate backend name")
+_RE_DUPLICATE_POOL = re.compile("Duplicate Ceph pool")
+
+_BASE_CONFIG = types.MappingProxyType(
+    {
+        "database": {"url": "sqlite:///test.db"},
+        "rabbitmq": {"url": "amqp://localhost"},
+        "cinder": {"project-id": "test-project", "user-id": "test-user"},
+    }
+)
+
+
+_DELLSC_BASE = types.MappingProxyType(
+    {
+        "volume-backend-name": "dellsc01",
+        "san-ip": "10.0.0.10",
+        "san-login": "admin",
+        "san-password": "secret",
+    }
+)
+
+
+def _ceph_backend(name, pool):
+    return {
+        "volume-backend-name": name,
+        "rbd-pool": pool,
+        "rbd-user": "cinder",
+        "rbd-secret-uuid": "secret-uuid",
+        "rbd-key": "secret-key",
+        "mon-hosts": "10.0.0.1",
+    }
+
+
+@pytest.fixture(scope="module")
+def database_cfg():
+    """Database configuration shared by read-only tests."""
+    return configuration.DatabaseConfiguration(url="sqlite:///test.db")
+
+
+@pytest.fixture(scope="module")
+def rabbitmq_cfg():
+    """RabbitMQ configuration shared by read-only tests."""
+    return configuration.RabbitMQConfiguration(url="amqp://localhost")
+
+
+@pytest.fixture(scope="module")
+def cinder_cfg():
+    """Cinder configuration shared by read-only tests."""
+    return configuration.CinderConfiguration(
+        **{
+            "project-id": "test-project",
+            "user-id": "test-user",
+            "image-volume-cache-enabled": True,
+            "image-volume-cache-max-size-gb": 100,
+            "image-volume-cache-max-count": 10,
+        }
+    )
+
 
 class TestToKebab:
     """Test the to_kebab function."""
@@ -25,6 +88,37 @@ class TestToKebab:
         """Test that to_kebab converts strings correctly."""
         assert configuration.to_kebab(input_str) == expected
 
+    @pytest.mark.parametrize(
+        "model",
+        [
+            configuration.Configuration,
+            configuration.CinderConfiguration,
+            configuration.Settings,
+            configuration.CephConfiguration,
+            configuration.HitachiConfiguration,
+            configuration.PureConfiguration,
+            configuration.DellSCConfiguration,
+            configuration.DellpowerstoreConfiguration,
+        ],
+    )
+    def test_to_kebab_matches_to_snake_for_fields(self, model):
+        """Test the snake_case fast path agrees with the generic conversion."""
+        for name in model.model_fields:
+            expected = to_snake(name).replace("_", "-")
+            assert configuration.to_kebab(name) == expected
+
+    @pytest.mark.parametrize("value", ["size1gb", "a1", "camelCase", "x_2"])
+    def test_to_kebab_slow_path(self, value):
+        """Test names the fast path skips still go through to_snake."""
+        assert configuration.to_kebab(value) == to_snake(value).replace("_", "-")
+
+    def test_to_kebab_cached(self):
+        """Test that repeated conversions are served from the cache."""
+        configuration.to_kebab("cachedField")
+        hits = configuration.to_kebab.cache_info().hits
+        assert configuration.to_kebab("cachedField") == "cached-field"
+        assert configuration.to_kebab.cache_info().hits == hits + 1
+
 
 class TestParentConfig:
     """Test the ParentConfig base class."""
@@ -38,33 +132,34 @@ class TestParentConfig:
 class TestDatabaseConfiguration:
     """Test the DatabaseConfiguration class."""
 
-    def test_database_config_creation(self):
+    def test_database_config_creation(self, database_cfg):
         """Test creating a DatabaseConfiguration instance."""
-        config = configuration.DatabaseConfiguration(url="sqlite:///test.db")
-        assert config.url == "sqlite:///test.db"
+        assert database_cfg.url == "sqlite:///test.db"
 
-    def test_database_config_alias(self):
+    def test_database_config_alias(self, database_cfg):
         """Test that DatabaseConfiguration uses kebab-case aliases."""
-        config = configuration.DatabaseConfiguration(url="sqlite:///test.db")
         # Test serialization uses the field name as-is (url)
-        data = config.model_dump(by_alias=True)
+        data = database_cfg.model_dump(by_alias=True)
         assert "url" in data
         assert data["url"] == "sqlite:///test.db"
 
+    def test_database_config_frozen(self, database_cfg):
+        """Test that validated configuration cannot be modified."""
+        with pytest.raises(pydantic.ValidationError):
+            database_cfg.url = "sqlite:///other.db"
+
 
 class TestRabbitMQConfiguration:
     """Test the RabbitMQConfiguration class."""
 
-    def test_rabbitmq_config_creation(self):
+    def test_rabbitmq_config_creation(self, rabbitmq_cfg):
         """Test creating a RabbitMQConfiguration instance."""
-        config = configuration.RabbitMQConfiguration(url="amqp://localhost")
-        assert config.url == "amqp://localhost"
+        assert rabbitmq_cfg.url == "amqp://localhost"
 
-    def test_rabbitmq_config_alias(self):
+    def test_rabbitmq_config_alias(self, rabbitmq_cfg):
         """Test that RabbitMQConfiguration uses kebab-case aliases."""
-        config = configuration.RabbitMQConfiguration(url="amqp://localhost")
         # Test serialization uses the field name as-is (url)
-        data = config.model_dump(by_alias=True)
+        data = rabbitmq_cfg.model_dump(by_alias=True)
         assert "url" in data
         assert data["url"] == "amqp://localhost"
 
@@ -72,36 +167,69 @@ class TestRabbitMQConfiguration:
 class TestCinderConfiguration:
     """Test the CinderConfiguration class."""
 
-    def test_cinder_config_creation(self):
+    def test_cinder_config_creation(self, cinder_cfg):
         """Test creating a CinderConfiguration instance."""
-        config = configuration.CinderConfiguration(
-            **{
-                "project-id": "test-project",
-                "user-id": "test-user",
-                "image-volume-cache-enabled": True,
-                "image-volume-cache-max-size-gb": 100,
-                "image-volume-cache-max-count": 10,
-            }
-        )
-        assert config.project_id == "test-project"
-        assert config.user_id == "test-user"
-        assert config.image_volume_cache_enabled is True
-        assert config.image_volume_cache_max_size_gb == 100
-        assert config.image_volume_cache_max_count == 10
+        assert cinder_cfg.model_dump() == {
+            "project_id": "test-project",
+            "user_id": "test-user",
+            "image_volume_cache_enabled": True,
+            "image_volume_cache_max_size_gb": 100,
+            "image_volume_cache_max_count": 10,
+            "default_volume_type": None,
+            "cluster": None,
+        }
 
-    def test_cinder_config_alias(self):
+    def test_cinder_config_alias(self, cinder_cfg):
         """Test that CinderConfiguration uses kebab-case aliases."""
-        config = configuration.CinderConfiguration(
+        assert cinder_cfg.project_id == "test-project"
+        assert cinder_cfg.user_id == "test-user"
+
+
+class TestBaseBackendConfiguration:
+    """Test the BaseBackendConfiguration class."""
+
+    def test_extra_fields_converted_to_snake_case(self):
+        """Test that extra kebab-case keys are stored as snake_case."""
+        config = configuration.PureConfiguration(
             **{
-                "project-id": "test-project",
-                "user-id": "test-user",
-                "image-volume-cache-enabled": True,
-                "image-volume-cache-max-size-gb": 100,
-                "image-volume-cache-max-count": 10,
+                "volume-backend-name": "pure1",
+                "san-ip": "10.0.0.10",
+                "pure-api-token": "token",
+                "pure-iscsi-cidr": "10.0.0.0/24",
             }
         )
-        assert config.project_id == "test-project"
-        assert config.user_id == "test-user"
+        assert config.volume_backend_name == "pure1"
+        assert config.model_dump()["pure_iscsi_cidr"] == "10.0.0.0/24"
+
+    def test_snake_case_extra_fields_kept(self):
+        """Test that payloads without kebab-case keys are left untouched."""
+        data = {"volume_backend_name": "pure1", "pure_iscsi_cidr": "10.0.0.0/24"}
+        assert configuration.PureConfiguration.convert_extra_fields(data) is data
+
+    @pytest.mark.parametrize(
+        "config_class",
+        [configuration.BaseBackendConfiguration, configuration.PureConfiguration],
+    )
+    def test_defined_aliases(self, config_class):
+        """Test that every defined field is indexed by its validation alias."""
+        assert config_class._defined_aliases() == {
+            configuration.to_kebab(name): name for name in config_class.model_fields
+        }
+        assert config_class._defined_aliases()["volume-backend-name"] == (
+            "volume_backend_name"
+        )
+
+    def test_protocol_must_be_lowercase(self):
+        """Test that the protocol pattern is checked case-sensitively."""
+        with pytest.raises(pydantic.ValidationError):
+            configuration.PureConfiguration(
+                **{
+                    "volume-backend-name": "pure1",
+                    "san-ip": "10.0.0.10",
+                    "pure-api-token": "token",
+                    "protocol": "iSCSI",
+                }
+            )
 
 
 class TestDellSCConfiguration:
@@ -111,44 +239,126 @@ class TestDellSCConfiguration:
         """Test dell-sc-ssn is required for DellSC backends."""
         with pytest.raises(pydantic.ValidationError):
             configuration.DellSCConfiguration(
-                **{
-                    "volume-backend-name": "dellsc01",
-                    "san-ip": "10.0.0.10",
-                    "san-login": "admin",
-                    "san-password": "secret",
-                    "enable-unsupported-driver": True,
-                }
+                **_DELLSC_BASE, **{"enable-unsupported-driver": True}
             )
 
     def test_dellsc_enable_unsupported_driver_must_be_true(self):
         """Test enable-unsupported-driver cannot be set to false."""
         with pytest.raises(pydantic.ValidationError):
             configuration.DellSCConfiguration(
-                **{
-                    "volume-backend-name": "dellsc01",
-                    "san-ip": "10.0.0.10",
-                    "san-login": "admin",
-                    "san-password": "secret",
-                    "dell-sc-ssn": 64702,
-                    "enable-unsupported-driver": False,
-                }
+                **_DELLSC_BASE,
+                **{"dell-sc-ssn": 64702, "enable-unsupported-driver": False},
             )
 
     def test_dellsc_accepts_valid_configuration(self):
         """Test valid DellSC backend configuration."""
         config = configuration.DellSCConfiguration(
+            **_DELLSC_BASE,
             **{
-                "volume-backend-name": "dellsc01",
-                "san-ip": "10.0.0.10",
-                "san-login": "admin",
-                "san-password": "secret",
                 "dell-sc-ssn": 64702,
                 "protocol": "fc",
                 "enable-unsupported-driver": True,
                 "secondary-san-ip": "10.0.0.11",
                 "secondary-san-login": "admin2",
                 "secondary-san-password": "secret2",
-            }
+            },
         )
         assert str(config.san_ip) == "10.0.0.10"
         assert config.dell_sc_ssn == 64702
+
+
+class TestConfiguration:
+    """Test the Configuration class."""
+
+    def test_backend_fields(self):
+        """Test that backend fields are discovered from the model."""
+        assert configuration.backend_fields(configuration.Configuration) == (
+            "ceph",
+            "hitachi",
+            "pure",
+            "dellsc",
+            "dellpowerstore",
+        )
+
+    def test_backend_fields_of_subclass(self):
+        """Test that backend fields added by a subclass are discovered."""
+
+        class ExtendedConfiguration(configuration.Configuration):
+            extra_pure: dict[str, configuration.PureConfiguration] = {}
+
+        assert configuration.backend_fields(ExtendedConfiguration) == (
+            *configuration.backend_fields(configuration.Configuration),
+            "extra_pure",
+        )
+        pure = {
+            "volume-backend-name": "array",
+            "san-ip": "10.0.0.10",
+            "pure-api-token": "token",
+        }
+        with pytest.raises(pydantic.ValidationError, match=_RE_DUPLICATE_NAME):
+            ExtendedConfiguration.model_validate(
+                {**_BASE_CONFIG, "pure": {"pure1": pure}, "extra-pure": {"pure2": pure}}
+            )
+
+    def test_from_snap_json(self):
+        """Test loading the configuration from snapctl JSON output."""
+        raw = json.dumps(
+            {**_BASE_CONFIG, "ceph": {"ceph1": _ceph_backend("ceph1", "volumes")}}
+        )
+        config = configuration.Configuration.from_snap_json(raw)
+        assert config == configuration.Configuration.model_validate(json.loads(raw))
+        assert config.ceph["ceph1"].rbd_pool == "volumes"
+
+    def test_unique_backend_names(self):
+        """Test that backends with distinct names are accepted."""
+        config = configuration.Configuration.model_validate(
+            {
+                **_BASE_CONFIG,
+                "ceph": {
+                    "ceph1": _ceph_backend("ceph1", "volumes"),
+                    "ceph2": _ceph_backend("ceph2", "ssd"),
+                },
+            }
+        )
+        assert set(config.ceph) == {"ceph1", "ceph2"}
+        assert [(t, k) for t, k, _ in config.iter_backends()] == [
+            ("ceph", "ceph1"),
+            ("ceph", "ceph2"),
+        ]
+
+    def test_duplicate_backend_name_rejected(self):
+        """Test that backend names must be unique across backend types."""
+        with pytest.raises(pydantic.ValidationError, match=_RE_DUPLICATE_NAME):
+            configuration.Configuration.model_validate(
+                {
+                    **_BASE_CONFIG,
+                    "pure": {
+                        "pure1": {
+                            "volume-backend-name": "array",
+                            "san-ip": "10.0.0.10",
+                            "pure-api-token": "token",
+                        }
+                    },
+                    "dellpowerstore": {
+                        "powerstore1": {
+                            "volume-backend-name": "array",
+                            "san-ip": "10.0.0.20",
+                            "san-login": "admin",
+                            "san-password": "secret",
+                        }
+                    },
+                }
+            )
+
+    def test_duplicate_ceph_pool_rejected(self):
+        """Test that a Ceph pool can only be used by one backend."""
+        with pytest.raises(pydantic.ValidationError, match=_RE_DUPLICATE_POOL):
+            configuration.Configuration.model_validate(
+                {
+                    **_BASE_CONFIG,
+                    "ceph": {
+                        "ceph1": _ceph_backend("ceph1", "volumes"),
+                        "ceph2": _ceph_backend("ceph2", "volumes"),
+                    },
+                }
+            )
@@ -3,6 +3,8 @@
 
 from unittest.mock import Mock
 
+import pytest
+
 from cinder_volume import context
 
 
@@ -49,3 +51,17 @@ class TestSnapPathContext:
         result = ctx.context()
         expected = {"common": "/snap/common", "data": "/snap/data"}
         assert result == expected
+
+    def test_snap_path_context_computed_once(self):
+        """Test that snap paths are read once and cannot be modified."""
+        mock_snap = Mock()
+        mock_snap.paths.__slots__ = ["common"]
+        mock_snap.paths.common = "/snap/common"
+
+        ctx = context.SnapPathContext(snap=mock_snap)
+        mock_snap.paths.common = "/other"
+
+        assert ctx.context() is ctx.context()
+        assert ctx.context()["common"] == "/snap/common"
+        with pytest.raises(TypeError):
+            ctx.context()["common"] = "/other"